@@ -5,22 +5,67 @@ Supports VAYUVEG + ShodhSetu from one engine
 
 from __future__ import annotations
 
-from itertools import zip_longest
-from typing import Dict, List, Optional
-
-import markdown
-from flask import Flask, abort, make_response, render_template, request
-from markupsafe import escape
+import os
+import re
+import sys
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
+
+import mistune
+import xxhash
+from flask import (
+    Flask,
+    Response,
+    abort,
+    make_response,
+    render_template,
+    request,
+    stream_template,
+)
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
 
 app = Flask(__name__)
 
+# escape() runs 3x per article; make sure the MarkupSafe C accelerator is
+# actually loaded rather than silently falling back to the pure-Python scan.
+try:
+    from markupsafe import _speedups  # noqa: F401 - ensure C accel loaded
+except ImportError:
+    app.logger.warning(
+        "markupsafe._speedups not available; escape() will use the slow "
+        "pure-Python path. Install a MarkupSafe wheel with the C extension."
+    )
+
+# Persist compiled Jinja bytecode to disk so fresh workers skip the parse
+# step on first render, and don't stat template mtimes on every request.
+_JINJA_CACHE_DIR = "/tmp/jinja_cache"
+os.makedirs(_JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+    directory=_JINJA_CACHE_DIR, pattern="__jinja2_%s.cache"
+)
+app.jinja_env.auto_reload = False
+
+# One renderer instance reused across requests; mistune keeps per-call
+# allocations low, which matters because /preview re-renders every summary
+# on each keystroke.
+_MD = mistune.create_markdown(escape=True, hard_wrap=False, plugins=[])
+
 # -------------------------------------------------------------------
 # CONFIG
 # -------------------------------------------------------------------
 
-AVAILABLE_THEMES = {"classic", "magazine", "saffron", "shodsetu"}
+# frozenset + interned keys: membership tests on the request path hit the
+# pointer-equality fast path before falling back to a hash probe.
+AVAILABLE_THEMES = frozenset(
+    sys.intern(theme) for theme in ("classic", "magazine", "saffron", "shodsetu")
+)
+
+DEFAULT_THEME = sys.intern("classic")
 
-DEFAULT_THEME = "classic"
+DEFAULT_BRAND = sys.intern("vayuveg")
 
 BRANDS = {
     "vayuveg": {
@@ -35,64 +80,188 @@ BRANDS = {
     },
 }
 
+# Per-brand template kwargs, built once so render_newsletter doesn't
+# reassemble the same context dict on every request.
+_BRAND_CTX = {
+    brand: {
+        "brand_name": cfg["brand_name"],
+        "site_url": cfg["site_url"],
+        "logo_url": cfg["logo_url"],
+        "current_year": 2026,
+        "unsubscribe_url": "[UNSUBSCRIBE_URL]",
+    }
+    for brand, cfg in BRANDS.items()
+}
+
+# Theme -> template path, precomputed so render_newsletter does a dict
+# lookup instead of formatting a fresh path string per request.
+_TEMPLATE_PATHS = {theme: f"themes/{theme}/newsletter.html" for theme in AVAILABLE_THEMES}
+
 # -------------------------------------------------------------------
 # HELPERS
 # -------------------------------------------------------------------
 
 def resolve_brand(value: Optional[str]) -> str:
-    return value if value in BRANDS else "vayuveg"
+    return value if value in BRANDS else DEFAULT_BRAND
 
 
 def resolve_theme(value: Optional[str]) -> str:
     return value if value in AVAILABLE_THEMES else DEFAULT_THEME
 
 
-def _getlist_fallback(form, *names: str) -> List[str]:
-    for name in names:
-        values = form.getlist(name)
-        if values and any(v.strip() for v in values):
-            return values
-    return form.getlist(names[0]) if names else []
+def _pick_nonempty(primary: List[str], fallback: List[str]) -> List[str]:
+    for v in primary:
+        # isspace() on the raw value avoids allocating a stripped copy
+        if v and not v.isspace():
+            return primary
+    for v in fallback:
+        if v and not v.isspace():
+            return fallback
+    return primary
+
+
+class Article:
+    """Rendered article row; __slots__ keeps it compact and makes Jinja's
+    ``article.title`` hit a fixed slot instead of a dict hash probe."""
+
+    __slots__ = ("title", "summary", "image", "url")
+
+    def __init__(self, title, summary, image, url):
+        self.title = title
+        self.summary = summary
+        self.image = image
+        self.url = url
+
+
+# Characters that can start Markdown syntax; summaries without any of them
+# are plain text and don't need the full parser.
+_MD_TRIGGERS = re.compile(r"[*_`#\[!>\n]")
+
+
+def _render_summary(text: str) -> Markup:
+    if not text:
+        return Markup("")
+    if _MD_TRIGGERS.search(text) is None:
+        return Markup(f"<p>{escape(text)}</p>")
+    return Markup(_MD(text))
+
+
+# Summaries over this size go through the worker pool; tiny ones aren't
+# worth the submit/result round-trip.
+_MD_ASYNC_THRESHOLD = 512
+
+_MD_POOL = ThreadPoolExecutor(max_workers=2)
+
+# Content -> in-flight/finished render, FIFO-bounded. Dedupes repeated big
+# summaries even when the article-level cache misses (e.g. only the title
+# of a row changed between keystrokes).
+_MD_FUTURES: OrderedDict[str, Future] = OrderedDict()
+_MD_FUTURES_SIZE = 256
+
+
+def _md_async(text: str) -> Future:
+    future = _MD_FUTURES.get(text)
+    if future is None:
+        future = _MD_POOL.submit(_render_summary, text)
+        _MD_FUTURES[text] = future
+        if len(_MD_FUTURES) > _MD_FUTURES_SIZE:
+            _MD_FUTURES.popitem(last=False)
+    return future
 
 
-def parse_articles(form) -> List[Dict[str, str]]:
-    articles: List[Dict[str, str]] = []
+def _summary_html(text: str) -> Markup:
+    if len(text) > _MD_ASYNC_THRESHOLD:
+        return _md_async(text).result()
+    return _render_summary(text)
 
-    titles = _getlist_fallback(form, "title")
-    summaries = _getlist_fallback(form, "summary", "desc")
-    images = _getlist_fallback(form, "image", "img")
-    links = _getlist_fallback(form, "url", "link")
 
-    for title, summary, image, url in zip_longest(
-        titles, summaries, images, links, fillvalue=""
-    ):
-        title = (title or "").strip()
+@lru_cache(maxsize=4096)
+def _render_article(title: str, summary: str, image: str, url: str) -> Article:
+    # The editor resubmits mostly-unchanged articles on every keystroke,
+    # so caching the rendered article skips Markdown parsing almost every
+    # time. Title/image/url stay raw strings: the .html templates are
+    # autoescaped, so Jinja escapes them once in its C-backed sweep instead
+    # of us paying for an extra escape() here.
+    return Article(
+        title,
+        _summary_html(summary),
+        image,
+        url,
+    )
+
+
+def parse_articles(form) -> List[Article]:
+    articles: List[Article] = []
+
+    # One walk over the MultiDict instead of a getlist() traversal per
+    # field name (4 canonical + 3 fallbacks).
+    buckets: dict[str, List[str]] = {
+        "title": [], "summary": [], "desc": [],
+        "image": [], "img": [], "url": [], "link": [],
+    }
+    for key, value in form.items(multi=True):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.append(value)
+
+    titles = buckets["title"]
+    summaries = _pick_nonempty(buckets["summary"], buckets["desc"])
+    images = _pick_nonempty(buckets["image"], buckets["img"])
+    links = _pick_nonempty(buckets["url"], buckets["link"])
+
+    # Local bindings keep the hot loop on LOAD_FAST instead of LOAD_GLOBAL /
+    # repeated method lookups.
+    _render = _render_article
+    _strip = str.strip
+    _append = articles.append
+
+    # Rows only exist where a title does, so iterate the title list and
+    # bounds-check the trailing lists instead of paying zip_longest a
+    # tuple allocation per row.
+    n_summaries = len(summaries)
+    n_images = len(images)
+    n_links = len(links)
+
+    # Kick off pool renders for all large summaries up front so they
+    # overlap instead of being resolved one at a time in the build loop.
+    for i in range(min(len(titles), n_summaries)):
+        summary = _strip(summaries[i])
+        if len(summary) > _MD_ASYNC_THRESHOLD:
+            _md_async(summary)
+
+    for i in range(len(titles)):
+        title = _strip(titles[i])
         if not title:
             continue
 
-        articles.append(
-            {
-                "title": escape(title),
-                "summary": markdown.markdown((summary or "").strip()),
-                "image": escape((image or "").strip()),
-                "url": escape((url or "").strip()),
-            }
+        _append(
+            _render(
+                title,
+                _strip(summaries[i]) if i < n_summaries else "",
+                _strip(images[i]) if i < n_images else "",
+                _strip(links[i]) if i < n_links else "",
+            )
         )
 
     return articles
 
 
-def render_newsletter(brand: str, theme: str, articles: list[dict[str, str]]):
-    brand_cfg = BRANDS[brand]
-
+def render_newsletter(brand: str, theme: str, articles: List[Article]):
     return render_template(
-        f"themes/{theme}/newsletter.html",
-        brand_name=brand_cfg["brand_name"],
-        site_url=brand_cfg["site_url"],
-        logo_url=brand_cfg["logo_url"],
-        current_year=2026,
-        unsubscribe_url="[UNSUBSCRIBE_URL]",
+        _TEMPLATE_PATHS[theme],
+        articles=articles,
+        **_BRAND_CTX[brand],
+    )
+
+
+def render_newsletter_stream(brand: str, theme: str, articles: List[Article]):
+    # Streamed variant for downloads: first bytes go out as soon as the
+    # header renders, and memory stays at one buffer chunk instead of the
+    # whole document.
+    return stream_template(
+        _TEMPLATE_PATHS[theme],
         articles=articles,
+        **_BRAND_CTX[brand],
     )
 
 
@@ -110,14 +279,41 @@ def editor():
     return render_template("editor.html")
 
 
+# Rendered /preview HTML keyed by a hash of the raw form body. The editor
+# POSTs on every keystroke and frequently resubmits identical payloads
+# (focus changes, stray resubmits); a hit skips parsing and rendering.
+_PREVIEW_CACHE: OrderedDict[int, str] = OrderedDict()
+_PREVIEW_CACHE_SIZE = 128
+
+
 @app.route("/preview", methods=["POST"])
 def preview():
-    brand = resolve_brand(request.form.get("brand"))
-    theme = resolve_theme(request.form.get("theme"))
-    articles = parse_articles(request.form)
+    raw = request.get_data(cache=True)
+    key = xxhash.xxh3_64_intdigest(raw)
+
+    # Weak ETag over the request body: if the editor resubmits an unchanged
+    # payload with If-None-Match, skip rendering and the response body both.
+    etag = f'W/"{key:016x}"'
+    if request.headers.get("If-None-Match") == etag:
+        return "", 304
+
+    html = _PREVIEW_CACHE.get(key)
+    if html is None:
+        brand = resolve_brand(request.form.get("brand"))
+        theme = resolve_theme(request.form.get("theme"))
+        articles = parse_articles(request.form)
 
-    # preview should never hard-fail while typing
-    return render_newsletter(brand, theme, articles)
+        # preview should never hard-fail while typing
+        html = render_newsletter(brand, theme, articles)
+
+        _PREVIEW_CACHE[key] = html
+        if len(_PREVIEW_CACHE) > _PREVIEW_CACHE_SIZE:
+            _PREVIEW_CACHE.popitem(last=False)
+
+    response = make_response(html)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-store, max-age=0"
+    return response
 
 
 @app.route("/export", methods=["POST"])
@@ -129,18 +325,23 @@ def export():
     if not articles:
         abort(400, "No articles to export")
 
-    html = render_newsletter(brand, theme, articles)
-
-    response = make_response(html)
+    response = make_response(render_newsletter_stream(brand, theme, articles))
     response.headers["Content-Type"] = "text/html; charset=utf-8"
     response.headers["Content-Disposition"] = (
         f'attachment; filename="{brand}-weekly-newsletter.html"'
     )
     return response
 
+# Liveness probes hit /health at multi-Hz; serve one prebuilt Response
+# instead of allocating and serializing a dict per probe. Reusing the
+# object is safe as long as the handler never mutates it.
+_HEALTH = Response(b'{"status":"ok"}', status=200, mimetype="application/json")
+_HEALTH.headers["Cache-Control"] = "no-store"
+
+
 @app.route("/health")
 def health():
-    return {"status": "ok"}
+    return _HEALTH
 
 
 if __name__ == "__main__":